@@ -10,16 +10,18 @@ torch.classes.__path__ = _DummyPath()
 # ──────────────────────────────────────────────────────────────────────────────
 
 
+import time
+import uuid
 from pathlib import Path
 import streamlit as st
 from st_cytoscape import cytoscape
 
-from src.loaders.document_loader import load_documents_and_chunk_sentences
+from src.jobs.job_queue import submit_job, get_job, requeue_job, discard_job, known_document_hashes
 from src.model.load_model import load_llm, load_embedder
-from src.processors.triple_extractor import extract_triples
-from src.processors.graph_builder import build_graph
+from src.processors.graph_builder import build_graph, graph_from_elements
+from src.processors.graph_analytics import analyze_graph
 from src.processors.qa_chain import answer_question
-from src.utils.file_utils import save_uploaded_files, clear_uploads_dir
+from src.utils.file_utils import save_uploaded_files, session_workspace, clear_uploads_dir, remove_upload_batch
 
 demo_triples = [
     # — Space & NASA
@@ -82,9 +84,19 @@ demo_triples = [
 ]
 
 
-# directory for user uploaded documents
+# directory for user uploaded documents, every session gets its own workspace
+# and every ingest job its own subfolder in there
 UPLOAD_DIR = Path("uploads")
 
+# seconds between status polls of a running ingest job
+JOB_POLL_INTERVAL = 2
+
+# node colours per community, communities beyond the palette keep the default colour
+COMMUNITY_COLORS = [
+    "#1f77b4", "#ff7f0e", "#d62728", "#9467bd", "#8c564b",
+    "#e377c2", "#7f7f7f", "#bcbd22", "#17becf", "#aec7e8",
+]
+
 def main():
     st.set_page_config(
         page_title="Knowledge Graph Agent",
@@ -93,6 +105,9 @@ def main():
     )
     st.title("📚 Knowledge Graph Agent")
 
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+
     # load models once
     llm = load_llm()
     embedder = load_embedder()
@@ -124,21 +139,25 @@ def main():
                 st.markdown(st.session_state["context"])
 
         else:
-            # No graph yet, show upload option & build graph button
+            # No graph yet, show upload option & build graph button,
+            # disabled while an ingest job of this session is still open
+            job_id = st.session_state.get("ingest_job_id") or st.query_params.get("job")
+
             st.header("1) Upload Documents")
             files = st.file_uploader(
                 "Upload one or more documents (txt, md, pdf, docx), they may be about any domain",
-                type=["txt", "md", "pdf", "docx"],
-                accept_multiple_files=True
+                type=["txt", "md", "pdf", "docx", "zip"],
+                accept_multiple_files=True,
+                disabled=bool(job_id),
             )
-            use_demo = st.checkbox("Use demo graph instead of LLM triples", value=True)
+            use_demo = st.checkbox("Use demo graph instead of LLM triples", value=True, disabled=bool(job_id))
 
-            if st.button("2) Build Knowledge Graph"):
+            if st.button("2) Build Knowledge Graph", disabled=bool(job_id)):
                 if use_demo:
                     triples = demo_triples
                     st.write("🔍 Using demo triples:", len(triples))
                     st.info("Building graph…")
-                    G, elements = build_graph(triples)
+                    G, elements = analyze_graph(*build_graph(triples))
                     st.session_state.graph = G
                     st.session_state.cyto_elements = elements
                     st.success("✅ Knowledge graph built!")
@@ -146,22 +165,60 @@ def main():
                     st.error("▶️ Please upload at least one file or ZIP.")
                 else:
                     with st.spinner("Saving and extracting uploads…"):
-                        clear_uploads_dir(UPLOAD_DIR)
-                        docs_path = save_uploaded_files(files, UPLOAD_DIR)
-
-                    st.info("Loading documents..")
-                    docs = load_documents_and_chunk_sentences(docs_path)
-                    st.write("🔍 Raw documents loaded:", len(docs))
-
-                    st.info("Extracting triples..")
-                    triples = extract_triples(docs, llm)
-                    st.write("🔍 Triples extracted:", len(triples))
-
-                    st.info("Building graph..")
-                    G, elements = build_graph(triples)
+                        # no job of this session is open, so older batches are safe to drop
+                        workspace = session_workspace(UPLOAD_DIR, st.session_state.session_id)
+                        clear_uploads_dir(workspace)
+                        docs_path = save_uploaded_files(
+                            files, workspace / uuid.uuid4().hex, known_document_hashes()
+                        )
+
+                    # the background worker (python -m src.jobs.worker) does the heavy lifting
+                    # keep the job id in the URL too, so a browser refresh picks the job back up
+                    job_id = submit_job(docs_path)
+                    st.session_state.ingest_job_id = job_id
+                    st.query_params["job"] = job_id
+
+            if job_id:
+                job = get_job(job_id)
+                if job is None:
+                    st.error("🚨 Ingest job not found, please build the graph again.")
+                    st.session_state.pop("ingest_job_id", None)
+                    st.query_params.pop("job", None)
+                elif job["status"] == "done":
+                    # the worker already built and analysed the graph, only rebuild G from its elements
+                    st.info("Loading graph..")
+                    elements = job["result"]["elements"]
+                    G, elements = analyze_graph(graph_from_elements(elements), elements)
                     st.session_state.graph = G
                     st.session_state.cyto_elements = elements
+                    st.session_state.pop("ingest_job_id", None)
+                    st.query_params.pop("job", None)
                     st.success("✅ Knowledge graph built!")
+                elif job["status"] == "failed":
+                    st.error("🚨 Ingest job failed.")
+                    with st.expander("Error details"):
+                        st.code(job["error"])
+                    col_resume, col_discard = st.columns(2)
+                    if col_resume.button("Resume job"):
+                        requeue_job(job_id)
+                        st.rerun()
+                    if col_discard.button("Discard job"):
+                        discard_job(job_id)
+                        remove_upload_batch(Path(job["docs_path"]))
+                        st.session_state.pop("ingest_job_id", None)
+                        st.query_params.pop("job", None)
+                        st.rerun()
+                else:
+                    if job["total_chunks"] is None:
+                        st.info(f"Job {job['status']}: loading documents..")
+                    else:
+                        st.info(f"Job {job['status']}: extracting triples..")
+                        st.progress(
+                            job["done_chunks"] / max(job["total_chunks"], 1),
+                            text=f"{job['done_chunks']} / {job['total_chunks']} chunks",
+                        )
+                    time.sleep(JOB_POLL_INTERVAL)
+                    st.rerun()
 
 
     def build_focus_styles(G, click_payload):
@@ -196,10 +253,37 @@ def main():
                 })
         return styles
 
+    def filter_elements(elements, min_centrality):
+        # keep nodes at or above the centrality threshold and the edges between them
+        kept = {
+            el["data"]["id"] for el in elements
+            if "id" in el["data"] and el["data"].get("centrality", 1.0) >= min_centrality
+        }
+        return [
+            el for el in elements
+            if el["data"].get("id") in kept
+            or (el["data"].get("source") in kept and el["data"].get("target") in kept)
+        ]
+
     elements = st.session_state.get("cyto_elements")
     G        = st.session_state.get("graph")
 
     if elements and G is not None:
+        # analytics were computed once after building the graph and cached on it
+        analytics = G.graph.get("analytics", {})
+        col_filter, col_color = st.columns(2)
+        with col_filter:
+            min_centrality = st.slider(
+                "Hide nodes with centrality below", 0.0, 1.0, 0.0, 0.05,
+                help="PageRank scaled so the most central node is 1",
+            )
+        with col_color:
+            color_by_community = st.checkbox(
+                f"Colour nodes by community ({analytics.get('num_communities', 0)} found)",
+                value=True,
+            )
+        visible_elements = filter_elements(elements, min_centrality)
+
         base_stylesheet = [
             { "selector": "node", "style": {
                 "opacity": 0.4, "label": "data(label)",
@@ -218,7 +302,16 @@ def main():
                 "target-arrow-shape": "triangle",
                 "line-color": "#777",
             }},
+            { "selector": "node[centrality]", "style": {
+                "width": "mapData(centrality, 0, 1, 20, 80)",
+                "height": "mapData(centrality, 0, 1, 20, 80)",
+            }},
         ]
+        if color_by_community:
+            base_stylesheet += [
+                { "selector": f"node[community = {i}]", "style": {"background-color": color}}
+                for i, color in enumerate(COMMUNITY_COLORS)
+            ]
         
         prev_click = st.session_state.get("kg_click")
         print("🔹 prev_click:", prev_click)
@@ -229,7 +322,7 @@ def main():
 
         # cytoscape for graph
         clicked = cytoscape(
-            elements=elements,
+            elements=visible_elements,
             stylesheet=full_styles,
             layout={
                 "name": "breadthfirst",
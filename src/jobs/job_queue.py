@@ -0,0 +1,353 @@
+import json
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from langchain.schema import Document
+
+
+# SQLite file shared by the Streamlit UI (submits & polls) and the worker (runs jobs)
+JOBS_DB = Path(__file__).parent.parent.parent / "jobs.db"
+
+# workers heartbeat their running job this often, from a background thread
+HEARTBEAT_INTERVAL_SECONDS = 10
+
+# a running job whose worker has not sent a heartbeat for this long is considered crashed
+STALE_AFTER_SECONDS = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id            TEXT PRIMARY KEY,
+    status        TEXT NOT NULL,
+    docs_path     TEXT NOT NULL,
+    created_at    REAL NOT NULL,
+    updated_at    REAL NOT NULL,
+    heartbeat_at  REAL,
+    worker_id     TEXT,
+    claim_token   TEXT,
+    total_chunks  INTEGER,
+    done_chunks   INTEGER NOT NULL DEFAULT 0,
+    reused_hashes TEXT,
+    error         TEXT,
+    result        TEXT
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    job_id        TEXT NOT NULL,
+    idx           INTEGER NOT NULL,
+    page_content  TEXT NOT NULL,
+    metadata      TEXT NOT NULL,
+    doc_hash      TEXT,
+    triples       TEXT,
+    PRIMARY KEY (job_id, idx)
+);
+CREATE TABLE IF NOT EXISTS documents (
+    hash          TEXT PRIMARY KEY,
+    triples       TEXT NOT NULL,
+    created_at    REAL NOT NULL
+);
+"""
+
+
+class LeaseLostError(Exception):
+    """Raised when a worker writes to a job that has since been claimed by another worker"""
+
+
+@contextmanager
+def _connect(db_path: Path = JOBS_DB):
+    """
+    Open a connection in autocommit mode (transactions are started explicitly)
+    and make sure it is closed again
+    """
+    conn = sqlite3.connect(str(db_path), timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        yield conn
+    finally:
+        conn.close()
+
+
+def submit_job(docs_path: Path, db_path: Path = JOBS_DB) -> str:
+    """
+    Queue a new ingest job for the documents in docs_path and return its id.
+    The path is stored absolute, so workers started from another directory find it
+    """
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    with _connect(db_path) as conn:
+        conn.execute(
+            "INSERT INTO jobs (id, status, docs_path, created_at, updated_at) VALUES (?, 'queued', ?, ?, ?)",
+            (job_id, str(Path(docs_path).resolve()), now, now),
+        )
+    return job_id
+
+
+def get_job(job_id: str, db_path: Path = JOBS_DB) -> Optional[Dict]:
+    """
+    Return the job as a dict (result decoded from JSON), or None if it does not exist
+    """
+    with _connect(db_path) as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    if row is None:
+        return None
+    job = dict(row)
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+def claim_next_job(
+    worker_id: str,
+    db_path: Path = JOBS_DB,
+    stale_after: float = STALE_AFTER_SECONDS,
+) -> Optional[Dict]:
+    """
+    Atomically pick the oldest queued job, or a running job whose worker stopped
+    sending heartbeats (crashed), mark it running under a fresh claim token and return it.
+    All later writes for the job must pass that token
+    """
+    now = time.time()
+    token = uuid.uuid4().hex
+    with _connect(db_path) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id FROM jobs "
+                "WHERE status = 'queued' OR (status = 'running' AND heartbeat_at < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (now - stale_after,),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', worker_id = ?, claim_token = ?, "
+                    "heartbeat_at = ?, updated_at = ? WHERE id = ?",
+                    (worker_id, token, now, now, row["id"]),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    return get_job(row["id"], db_path) if row is not None else None
+
+
+def release_worker_jobs(worker_id: str, db_path: Path = JOBS_DB) -> int:
+    """
+    Requeue the running jobs of a worker that is (re)starting, so it resumes them
+    right away instead of waiting for their heartbeat to go stale. Returns the number requeued
+    """
+    now = time.time()
+    with _connect(db_path) as conn:
+        cursor = conn.execute(
+            "UPDATE jobs SET status = 'queued', claim_token = NULL, updated_at = ? "
+            "WHERE status = 'running' AND worker_id = ?",
+            (now, worker_id),
+        )
+    return cursor.rowcount
+
+
+def _touch_lease(conn: sqlite3.Connection, job_id: str, token: str, now: float) -> None:
+    """
+    Refresh the heartbeat of a job inside the caller's transaction,
+    raises LeaseLostError (after rolling back) if the token no longer owns the job
+    """
+    cursor = conn.execute(
+        "UPDATE jobs SET heartbeat_at = ?, updated_at = ? "
+        "WHERE id = ? AND claim_token = ? AND status = 'running'",
+        (now, now, job_id, token),
+    )
+    if cursor.rowcount == 0:
+        conn.execute("ROLLBACK")
+        raise LeaseLostError(f"job {job_id} is no longer owned by this worker")
+
+
+def heartbeat(job_id: str, token: str, db_path: Path = JOBS_DB) -> None:
+    """
+    Tell the queue the worker holding token is still alive
+    """
+    with _connect(db_path) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        _touch_lease(conn, job_id, token, time.time())
+        conn.execute("COMMIT")
+
+
+def known_document_hashes(db_path: Path = JOBS_DB) -> Set[str]:
+    """
+    Return the content hashes of every document whose triples were already extracted by a finished job
+    """
+    with _connect(db_path) as conn:
+        rows = conn.execute("SELECT hash FROM documents").fetchall()
+    return {row["hash"] for row in rows}
+
+
+def save_chunks(
+    job_id: str,
+    token: str,
+    docs: List[Document],
+    reused_hashes: List[str],
+    db_path: Path = JOBS_DB,
+) -> None:
+    """
+    Persist the sentence chunks of a job so extraction can resume without reloading documents.
+    Each chunk keeps the content hash of its document (metadata["content_hash"]),
+    reused_hashes are already known documents whose stored triples the job reuses
+    """
+    now = time.time()
+    with _connect(db_path) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        _touch_lease(conn, job_id, token, now)
+        conn.execute("DELETE FROM chunks WHERE job_id = ?", (job_id,))
+        conn.executemany(
+            "INSERT INTO chunks (job_id, idx, page_content, metadata, doc_hash) VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    job_id, idx, doc.page_content,
+                    json.dumps(doc.metadata, default=str), doc.metadata.get("content_hash"),
+                )
+                for idx, doc in enumerate(docs)
+            ],
+        )
+        conn.execute(
+            "UPDATE jobs SET total_chunks = ?, done_chunks = 0, reused_hashes = ? WHERE id = ?",
+            (len(docs), json.dumps(reused_hashes), job_id),
+        )
+        conn.execute("COMMIT")
+
+
+def pending_chunks(job_id: str, db_path: Path = JOBS_DB) -> List[Tuple[int, Document]]:
+    """
+    Return (index, Document) for every chunk of the job that has not been checkpointed yet
+    """
+    with _connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT idx, page_content, metadata FROM chunks "
+            "WHERE job_id = ? AND triples IS NULL ORDER BY idx",
+            (job_id,),
+        ).fetchall()
+    return [
+        (row["idx"], Document(page_content=row["page_content"], metadata=json.loads(row["metadata"])))
+        for row in rows
+    ]
+
+
+def checkpoint_chunk(
+    job_id: str,
+    token: str,
+    idx: int,
+    triples: List[Dict[str, str]],
+    db_path: Path = JOBS_DB,
+) -> None:
+    """
+    Store the triples extracted from one chunk, bump the progress counter and heartbeat
+    """
+    now = time.time()
+    with _connect(db_path) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        _touch_lease(conn, job_id, token, now)
+        conn.execute(
+            "UPDATE chunks SET triples = ? WHERE job_id = ? AND idx = ?",
+            (json.dumps(triples), job_id, idx),
+        )
+        conn.execute(
+            "UPDATE jobs SET done_chunks = "
+            "(SELECT COUNT(*) FROM chunks WHERE job_id = ? AND triples IS NOT NULL) "
+            "WHERE id = ?",
+            (job_id, job_id),
+        )
+        conn.execute("COMMIT")
+
+
+def collect_triples(job_id: str, db_path: Path = JOBS_DB) -> List[Dict[str, str]]:
+    """
+    Concatenate the stored triples of the reused documents and the
+    checkpointed triples of all chunks in chunk order
+    """
+    with _connect(db_path) as conn:
+        job = conn.execute("SELECT reused_hashes FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        reused_hashes = json.loads(job["reused_hashes"]) if job and job["reused_hashes"] else []
+        reused_rows = [
+            conn.execute("SELECT triples FROM documents WHERE hash = ?", (content_hash,)).fetchone()
+            for content_hash in reused_hashes
+        ]
+        rows = conn.execute(
+            "SELECT triples FROM chunks WHERE job_id = ? AND triples IS NOT NULL ORDER BY idx",
+            (job_id,),
+        ).fetchall()
+    triples: List[Dict[str, str]] = []
+    for row in [row for row in reused_rows if row is not None] + rows:
+        triples.extend(json.loads(row["triples"]))
+    return triples
+
+
+def complete_job(job_id: str, token: str, result: Dict, db_path: Path = JOBS_DB) -> None:
+    """
+    Mark the job done and store its JSON-serialisable result. The triples of every
+    document of the job are added to the document index, keyed by content hash,
+    so later uploads of the same file reuse them instead of running the LLM again.
+    The job's chunks are purged afterwards, they are only needed to resume
+    """
+    now = time.time()
+    with _connect(db_path) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        _touch_lease(conn, job_id, token, now)
+        document_triples: Dict[str, List[Dict[str, str]]] = {}
+        for row in conn.execute(
+            "SELECT doc_hash, triples FROM chunks WHERE job_id = ? AND doc_hash IS NOT NULL ORDER BY idx",
+            (job_id,),
+        ):
+            document_triples.setdefault(row["doc_hash"], []).extend(json.loads(row["triples"]))
+        conn.executemany(
+            "INSERT OR IGNORE INTO documents (hash, triples, created_at) VALUES (?, ?, ?)",
+            [(content_hash, json.dumps(triples), now) for content_hash, triples in document_triples.items()],
+        )
+        conn.execute(
+            "UPDATE jobs SET status = 'done', result = ?, claim_token = NULL WHERE id = ?",
+            (json.dumps(result), job_id),
+        )
+        conn.execute("DELETE FROM chunks WHERE job_id = ?", (job_id,))
+        conn.execute("COMMIT")
+
+
+def fail_job(job_id: str, token: str, error: str, db_path: Path = JOBS_DB) -> None:
+    """
+    Mark the job failed; its checkpointed chunks are kept so it can be requeued
+    """
+    now = time.time()
+    with _connect(db_path) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        _touch_lease(conn, job_id, token, now)
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = ?, claim_token = NULL WHERE id = ?",
+            (error, job_id),
+        )
+        conn.execute("COMMIT")
+
+
+def requeue_job(job_id: str, db_path: Path = JOBS_DB) -> None:
+    """
+    Put a failed job back in the queue, it resumes from its last checkpointed chunk
+    """
+    now = time.time()
+    with _connect(db_path) as conn:
+        conn.execute(
+            "UPDATE jobs SET status = 'queued', error = NULL, updated_at = ? WHERE id = ? AND status = 'failed'",
+            (now, job_id),
+        )
+
+
+def discard_job(job_id: str, db_path: Path = JOBS_DB) -> None:
+    """
+    Give up on a failed job: mark it discarded and delete its checkpointed chunks
+    """
+    now = time.time()
+    with _connect(db_path) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        cursor = conn.execute(
+            "UPDATE jobs SET status = 'discarded', updated_at = ? WHERE id = ? AND status = 'failed'",
+            (now, job_id),
+        )
+        if cursor.rowcount:
+            conn.execute("DELETE FROM chunks WHERE job_id = ?", (job_id,))
+        conn.execute("COMMIT")
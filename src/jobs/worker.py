@@ -0,0 +1,166 @@
+"""
+Background ingest worker, run it next to the Streamlit app with:
+
+    python -m src.jobs.worker
+
+It polls the SQLite job queue, and for each job runs load -> extract -> build,
+checkpointing the triples of every chunk so a crashed job resumes where it stopped
+"""
+import argparse
+import os
+import socket
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List
+
+from langchain.llms import LlamaCpp
+from langchain.schema import Document
+
+from src.jobs.job_queue import (
+    HEARTBEAT_INTERVAL_SECONDS,
+    JOBS_DB,
+    LeaseLostError,
+    checkpoint_chunk,
+    claim_next_job,
+    collect_triples,
+    complete_job,
+    fail_job,
+    heartbeat,
+    pending_chunks,
+    release_worker_jobs,
+    save_chunks,
+)
+from src.loaders.document_loader import load_documents_and_chunk_sentences
+from src.model.load_model import load_llm
+from src.processors.graph_builder import build_graph
+from src.processors.graph_analytics import analyze_graph
+from src.processors.triple_extractor import extract_triples
+from src.utils.file_utils import read_manifest, remove_upload_batch
+
+
+@contextmanager
+def keep_alive(job_id: str, token: str, db_path: Path = JOBS_DB):
+    """
+    Heartbeat the job from a background thread while the block runs, so slow
+    document parsing or a long LLM call does not make the job look crashed
+    """
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(HEARTBEAT_INTERVAL_SECONDS):
+            try:
+                heartbeat(job_id, token, db_path)
+            except LeaseLostError:
+                # the next checkpoint raises as well and stops the job
+                print(f"[{job_id}] lease lost")
+                return
+            except Exception as e:
+                print(f"[{job_id}] heartbeat failed: {e}")
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def tag_content_hashes(docs: List[Document], docs_path: Path, manifest: Dict) -> None:
+    """
+    Copy the content hash of each chunk's source file from the upload manifest into its metadata
+    """
+    for doc in docs:
+        try:
+            relative_path = Path(doc.metadata["source"]).relative_to(docs_path).as_posix()
+        except (KeyError, ValueError):
+            continue
+        doc.metadata["content_hash"] = manifest["files"].get(relative_path)
+
+
+def run_job(job: Dict, llm: LlamaCpp, db_path: Path = JOBS_DB) -> None:
+    """
+    Run (or resume) a single ingest job
+    """
+    job_id, token = job["id"], job["claim_token"]
+
+    # 1) Load & chunk documents, skipped when resuming a job that already has its chunks
+    # files the upload already recognised by hash are not in docs_path, their stored triples are reused
+    if job["total_chunks"] is None:
+        docs_path = Path(job["docs_path"])
+        if not docs_path.is_dir():
+            # fail visibly instead of finishing with an empty graph
+            raise FileNotFoundError(f"upload folder {docs_path} does not exist")
+        manifest = read_manifest(docs_path)
+        docs = load_documents_and_chunk_sentences(docs_path)
+        tag_content_hashes(docs, docs_path, manifest)
+        save_chunks(job_id, token, docs, manifest["reused"], db_path)
+        print(f"[{job_id}] {len(docs)} chunks saved, {len(manifest['reused'])} known documents reused")
+
+    # the chunks are in jobs.db now, so the uploaded files are no longer needed
+    remove_upload_batch(Path(job["docs_path"]))
+
+    # 2) Extract triples chunk by chunk, checkpointing after each one
+    for idx, doc in pending_chunks(job_id, db_path):
+        triples = extract_triples([doc], llm)
+        checkpoint_chunk(job_id, token, idx, triples, db_path)
+        print(f"[{job_id}] chunk {idx} checkpointed with {len(triples)} triples")
+
+    # 3) Build and analyse the graph from all checkpointed triples
+    triples = collect_triples(job_id, db_path)
+    _, elements = analyze_graph(*build_graph(triples))
+    complete_job(job_id, token, {"elements": elements}, db_path)
+    print(f"[{job_id}] done, {len(triples)} triples")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Knowledge graph ingest worker")
+    parser.add_argument("--db", type=Path, default=JOBS_DB, help="path to the jobs SQLite database")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="seconds between queue polls")
+    parser.add_argument(
+        "--worker-id", default=None,
+        help="stable name of this worker, jobs it left running are resumed right away when it "
+             "restarts under the same name (default: unique <hostname>-<pid>)",
+    )
+    parser.add_argument("--once", action="store_true", help="exit once the queue is empty")
+    args = parser.parse_args()
+
+    llm = load_llm()
+
+    if args.worker_id is None:
+        # a fresh id never matches a live worker, crashed jobs are taken over once their heartbeat is stale
+        args.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        print(f"Worker {args.worker_id} polling {args.db}")
+    else:
+        # jobs still marked running under an explicit id were left behind by a crash, resume them now
+        released = release_worker_jobs(args.worker_id, args.db)
+        print(f"Worker {args.worker_id} polling {args.db}, {released} interrupted job(s) requeued")
+
+    while True:
+        job = claim_next_job(args.worker_id, args.db)
+        if job is None:
+            if args.once:
+                break
+            time.sleep(args.poll_interval)
+            continue
+
+        print(f"[{job['id']}] claimed ({job['done_chunks']}/{job['total_chunks'] or '?'} chunks done)")
+        try:
+            with keep_alive(job["id"], job["claim_token"], args.db):
+                run_job(job, llm, args.db)
+        except LeaseLostError:
+            # another worker reclaimed the job and continues from its checkpoints
+            print(f"[{job['id']}] lease lost, job abandoned")
+        except Exception:
+            try:
+                fail_job(job["id"], job["claim_token"], traceback.format_exc(), args.db)
+                print(f"[{job['id']}] failed")
+            except LeaseLostError:
+                print(f"[{job['id']}] failed after its lease was lost")
+
+
+if __name__ == "__main__":
+    main()
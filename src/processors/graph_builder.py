@@ -47,3 +47,20 @@ def build_graph(
         })
 
     return G, elements
+
+
+def graph_from_elements(elements: List[Dict]) -> nx.MultiDiGraph:
+    """
+    Rebuild the NetworkX knowledge graph from Cytoscape elements (e.g. stored by the ingest worker),
+    keeping every node data field such as precomputed analytics as a node attribute
+    """
+    G = nx.MultiDiGraph()
+    for element in elements:
+        data = element["data"]
+        if "id" in data:
+            G.add_node(data["id"], **{k: v for k, v in data.items() if k != "id"})
+    for element in elements:
+        data = element["data"]
+        if "source" in data and "target" in data:
+            G.add_edge(data["source"], data["target"], label=data["label"], relation_type=data["relation_type"])
+    return G
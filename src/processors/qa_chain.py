@@ -31,14 +31,15 @@ def answer_question(
     question: str,
     llm,
     embedder, # HuggingFaceEmbeddings instance
-    top_k: int = 5
+    top_k: int = 5,
+    prior_weight: float = 0.1
 ) -> str:
     """
     1) Extract triples from Cytoscape elements
     2) Embed all triples once (cached)
     3) Optionally filter to a single entity's facts
     4) Embed the question
-    5) Rank triples by cosine similarity
+    5) Rank triples by cosine similarity plus a node centrality prior
     6) Format a bullet-list context and call the LLM
     Returns: (answer, bullet_list)
     """
@@ -59,8 +60,11 @@ def answer_question(
     # 4) Embed the user's question
     question_embedding = embed_string(question, embedder)
 
-    # 5) Compute cosine similarity and select top_k triples
-    selected_triples = rank_and_select(top_k, triples_list, embeddings, question_embedding)
+    # 5) Compute cosine similarity, add the centrality prior and select top_k triples
+    prior = triple_priors(triples_list, node_centrality(elements))
+    selected_triples = rank_and_select(
+        top_k, triples_list, embeddings, question_embedding, prior, prior_weight
+    )
 
     # 6) Build a bullet-list context and call the LLM
     bullet_list, prompt = build_prompt(question, selected_triples)
@@ -137,13 +141,49 @@ def embed_string(question, embedder) -> np.ndarray:
     return question_embedding
 
 
-def rank_and_select(top_k, triples_list, embeddings, question_embedding) -> list:
+def node_centrality(elements) -> Dict[str, float]:
+    """
+    Read the precomputed centrality (PageRank scaled to 0-1) from the node elements,
+    empty if the graph analytics have not been run
+    """
+    return {
+        element["data"]["id"]: element["data"]["centrality"]
+        for element in elements
+        if "id" in element.get("data", {}) and "centrality" in element["data"]
+    }
+
+
+def triple_priors(triples_list, centrality: Dict[str, float]) -> np.ndarray:
+    """
+    Score every triple by the most central of its subject and object
+    """
+    return np.array([
+        max(centrality.get(subject, 0.0), centrality.get(object_, 0.0))
+        for subject, _, object_ in triples_list
+    ])
+
+
+def rank_and_select(
+    top_k,
+    triples_list,
+    embeddings,
+    question_embedding,
+    prior: Optional[np.ndarray] = None,
+    prior_weight: float = 0.0
+) -> list:
     """
-    Compute cosine similarity and select top_k triples
+    Compute cosine similarity, optionally add prior_weight * prior (e.g. node centrality)
+    so central facts win ties against noise, and select top_k triples
     """
     norms = np.linalg.norm(embeddings, axis=1) * np.linalg.norm(question_embedding)
     norms[norms == 0] = 1e-8
     similarities = (embeddings @ question_embedding) / norms
+    if prior is not None:
+        if len(prior) != len(similarities):
+            raise ValueError(
+                f"prior has {len(prior)} scores but there are {len(similarities)} triples"
+            )
+        similarities = similarities + prior_weight * prior
     top_indices = np.argsort(similarities)[-top_k:][::-1]
 
     selected_triples = [triples_list[i] for i in top_indices]
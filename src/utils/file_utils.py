@@ -1,10 +1,40 @@
+import hashlib
+import json
 import shutil
 import zipfile
-from pathlib import Path
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Dict, Optional, Set, Tuple
 
 import streamlit as st
 
 
+SUPPORTED_SUFFIXES = {".txt", ".md", ".pdf", ".docx"}
+
+# limits that keep a single upload (or ZIP bomb) from filling memory or disk
+MAX_FILE_BYTES = 100 * 1024 * 1024
+MAX_ZIP_MEMBERS = 1000
+MAX_ZIP_TOTAL_BYTES = 1024 * 1024 * 1024
+
+# files are streamed in blocks of this size, never read fully into memory
+COPY_BLOCK_BYTES = 1024 * 1024
+
+# name of the file written next to the saved uploads, it holds
+# {"files": {relative path: sha256}, "reused": [sha256 of skipped, already known files]}
+MANIFEST_NAME = "manifest.json"
+
+
+class UploadLimitError(Exception):
+    """Raised when a streamed file grows past its size limit"""
+
+
+def session_workspace(upload_dir: Path, session_id: str) -> Path:
+    """
+    Return the uploads folder owned by one Streamlit session, so concurrent
+    sessions never write into (or clear) each other's files
+    """
+    return upload_dir / session_id
+
+
 def clear_uploads_dir(upload_dir: Path) -> None:
     """
     Remove and recreate the uploads directory so it’s empty.
@@ -14,30 +44,205 @@ def clear_uploads_dir(upload_dir: Path) -> None:
     upload_dir.mkdir(parents=True, exist_ok=True)
 
 
-def save_uploaded_files(uploaded_files, upload_dir: Path) -> Path:
+def remove_upload_batch(batch_dir: Path) -> None:
+    """
+    Delete an upload batch once its documents are stored elsewhere,
+    and its session workspace too if that is left empty
     """
-    Save uploaded .txt/.md/.pdf/.docx files (or ZIPs) into upload_dir.
-    If a ZIP is uploaded, extract its contents and then delete the ZIP.
+    shutil.rmtree(batch_dir, ignore_errors=True)
+    try:
+        batch_dir.parent.rmdir()
+    except OSError:
+        # workspace still holds other batches, or is already gone
+        pass
+
+
+def _safe_member_path(member_name: str) -> Optional[Path]:
+    """
+    Turn a ZIP member name into a relative path, dropping absolute parts and `..`
+    """
+    parts = [
+        part for part in PurePosixPath(member_name.replace("\\", "/")).parts
+        if part not in {"", "/", ".", ".."}
+    ]
+    return Path(*parts) if parts else None
+
+
+def _unique_relative_path(relative_path: Path, upload_dir: Path) -> Path:
+    """
+    Return relative_path, or the first free `name-1.ext`, `name-2.ext`, ... next to it
+    """
+    candidate = relative_path
+    counter = 1
+    while (upload_dir / candidate).exists():
+        candidate = relative_path.with_name(f"{relative_path.stem}-{counter}{relative_path.suffix}")
+        counter += 1
+    return candidate
+
+
+def _stream_to_file(
+    source: BinaryIO,
+    target_path: Path,
+    max_bytes: int,
+) -> Tuple[str, int]:
+    """
+    Copy source into target_path block by block while hashing it,
+    returns the sha256 hex digest and the number of bytes read.
+    Raises UploadLimitError past max_bytes
+    """
+    digest = hashlib.sha256()
+    written = 0
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with open(target_path, "wb") as f:
+            while block := source.read(COPY_BLOCK_BYTES):
+                written += len(block)
+                if written > max_bytes:
+                    raise UploadLimitError(f"larger than {max_bytes} bytes")
+                digest.update(block)
+                f.write(block)
+    except BaseException:
+        target_path.unlink(missing_ok=True)
+        raise
+    return digest.hexdigest(), written
+
+
+def _save_stream(
+    source: BinaryIO,
+    relative_path: Path,
+    upload_dir: Path,
+    max_bytes: int,
+    manifest: Dict,
+    seen_hashes: Set[str],
+    known_hashes: Set[str],
+) -> int:
+    """
+    Stream one document into upload_dir, keeping it only if its content
+    has not been seen before, in this upload or in known_hashes (documents ingested earlier).
+    A different file that already uses the same name is never overwritten,
+    the new one gets a numbered name instead. Returns the number of bytes streamed,
+    also when the file is dropped, so callers can charge them against their limits
+    """
+    tmp_path = upload_dir / relative_path.with_name(relative_path.name + ".part")
+    content_hash, bytes_read = _stream_to_file(source, tmp_path, max_bytes)
+
+    if content_hash in seen_hashes or content_hash in known_hashes:
+        # duplicate content, drop it before the loader ever parses it
+        tmp_path.unlink()
+        if content_hash in known_hashes and content_hash not in manifest["reused"]:
+            manifest["reused"].append(content_hash)
+        return bytes_read
+
+    unique_path = _unique_relative_path(relative_path, upload_dir)
+    if unique_path != relative_path:
+        st.warning(f"⚠️ {relative_path.as_posix()} already exists, saved as {unique_path.as_posix()}")
+        relative_path = unique_path
+
+    tmp_path.replace(upload_dir / relative_path)
+    seen_hashes.add(content_hash)
+    manifest["files"][relative_path.as_posix()] = content_hash
+    return bytes_read
+
+
+def _save_zip_members(
+    uploaded_file,
+    upload_dir: Path,
+    manifest: Dict,
+    seen_hashes: Set[str],
+    known_hashes: Set[str],
+) -> None:
+    """
+    Stream the supported members of an uploaded ZIP straight into upload_dir/<zip name>/,
+    without writing the archive itself to disk
+    """
+    fname = uploaded_file.name
+    archive_dir = Path(Path(fname).stem)
+    try:
+        with zipfile.ZipFile(uploaded_file, "r") as z:
+            members = [info for info in z.infolist() if not info.is_dir()]
+            if len(members) > MAX_ZIP_MEMBERS:
+                st.error(f"🚨 ZIP file {fname} has {len(members)} files, the limit is {MAX_ZIP_MEMBERS}")
+                return
+
+            # every decompressed byte counts, kept or dropped as a duplicate
+            total_bytes = 0
+            for info in members:
+                member_path = _safe_member_path(info.filename)
+                if member_path is None or member_path.suffix.lower() not in SUPPORTED_SUFFIXES:
+                    continue
+                relative_path = archive_dir / member_path
+                if info.file_size > MAX_FILE_BYTES:
+                    st.warning(f"⚠️ Skipped {info.filename} in {fname}: file is too large")
+                    continue
+                if total_bytes + info.file_size > MAX_ZIP_TOTAL_BYTES:
+                    st.error(f"🚨 ZIP file {fname} is too large once extracted, remaining files skipped")
+                    return
+
+                # the declared size can lie, so the stream is limited as well
+                member_limit = min(MAX_FILE_BYTES, MAX_ZIP_TOTAL_BYTES - total_bytes)
+                try:
+                    with z.open(info) as member:
+                        total_bytes += _save_stream(
+                            member, relative_path, upload_dir, member_limit,
+                            manifest, seen_hashes, known_hashes,
+                        )
+                except UploadLimitError:
+                    # the whole limit was decompressed before the stream was cut off
+                    total_bytes += member_limit
+                    if total_bytes >= MAX_ZIP_TOTAL_BYTES:
+                        st.error(f"🚨 ZIP file {fname} is too large once extracted, remaining files skipped")
+                        return
+                    st.warning(f"⚠️ Skipped {info.filename} in {fname}: file is too large")
+    except zipfile.BadZipFile:
+        st.error(f"🚨 Failed to extract ZIP file: {fname}")
+
+
+def save_uploaded_files(
+    uploaded_files,
+    upload_dir: Path,
+    known_hashes: Optional[Set[str]] = None,
+) -> Path:
+    """
+    Stream uploaded .txt/.md/.pdf/.docx files (or the members of ZIPs) into upload_dir,
+    hashing them on the fly. Files whose content is in known_hashes (ingested by an
+    earlier job) or was already saved in this upload are skipped before they reach the loader.
+    The hashes of the saved files and of the skipped known files are written to
+    upload_dir/manifest.json, so the job can reuse the stored triples of the known ones.
     Returns the Path to the folder with all extracted/saved files.
     """
     upload_dir.mkdir(parents=True, exist_ok=True)
+    known_hashes = known_hashes or set()
+    seen_hashes: Set[str] = set()
+    manifest: Dict = {"files": {}, "reused": []}
 
     for uploaded_file in uploaded_files:
         fname = uploaded_file.name
-        target_path = upload_dir / fname
-
-        # Save the raw file
-        with open(target_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
+        uploaded_file.seek(0)
 
-        # If it’s a ZIP, extract and remove it
         if fname.lower().endswith(".zip"):
-            try:
-                with zipfile.ZipFile(target_path, "r") as z:
-                    z.extractall(upload_dir)
-            except zipfile.BadZipFile:
-                st.error(f"🚨 Failed to extract ZIP file: {fname}")
-            finally:
-                target_path.unlink()
+            _save_zip_members(uploaded_file, upload_dir, manifest, seen_hashes, known_hashes)
+            continue
+
+        try:
+            _save_stream(
+                uploaded_file, Path(Path(fname).name), upload_dir, MAX_FILE_BYTES,
+                manifest, seen_hashes, known_hashes,
+            )
+        except UploadLimitError:
+            st.warning(f"⚠️ Skipped {fname}: file is too large")
+
+    with open(upload_dir / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
 
     return upload_dir
+
+
+def read_manifest(upload_dir: Path) -> Dict:
+    """
+    Load the manifest written by save_uploaded_files, empty if there is none
+    """
+    manifest_path = upload_dir / MANIFEST_NAME
+    if not manifest_path.exists():
+        return {"files": {}, "reused": []}
+    with open(manifest_path, encoding="utf-8") as f:
+        return json.load(f)